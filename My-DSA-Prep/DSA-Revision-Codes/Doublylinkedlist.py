@@ -50,6 +50,98 @@ class doub:
         cur.prev.next = cur.next
         cur.next.prev = cur.prev
     
+    # sorting: same bottom-up natural merge sort as Linkedlist.sort
+    # merge only follows next pointers, prev pointers are fixed in one pass at the end
+
+    def _run_end(self, cur, key):
+        k = key(cur.data)
+        while cur.next:
+            nk = key(cur.next.data)
+            if nk < k:
+                break
+            cur = cur.next
+            k = nk
+        return cur
+
+    def _merge_runs(self, a, b, key):
+        dummy = tail = Node(None)
+        # keys of the two front nodes are kept and only recomputed when that side moves
+        ka = key(a.data) if a else None
+        kb = key(b.data) if b else None
+        while a and b:
+            if kb < ka: # take from a on ties -> stable
+                tail.next = b
+                b = b.next
+                if b:
+                    kb = key(b.data)
+            else:
+                tail.next = a
+                a = a.next
+                if a:
+                    ka = key(a.data)
+            tail = tail.next
+        tail.next = a if a else b
+        while tail.next:
+            tail = tail.next
+        return dummy.next, tail
+
+    def _fix_prev(self):
+        prev = None
+        cur = self.head
+        while cur:
+            cur.prev = prev
+            prev = cur
+            cur = cur.next
+
+    def sort(self, key=None):
+        key = key or (lambda x: x)
+        while self.head:
+            runs = 0
+            new_head = tail = None
+            cur = self.head
+            while cur:
+                a = cur
+                a_end = self._run_end(a, key)
+                b = a_end.next
+                a_end.next = None
+                if b:
+                    b_end = self._run_end(b, key)
+                    cur = b_end.next
+                    b_end.next = None
+                    first, last = self._merge_runs(a, b, key)
+                else:
+                    cur = None
+                    first, last = a, a_end
+
+                if tail is None:
+                    new_head = first
+                else:
+                    tail.next = first
+                tail = last
+                runs += 1
+            self.head = new_head
+            if runs == 1:
+                break
+        self._fix_prev()
+
+    def merge(self, other, key=None):
+        # both sorted; other's nodes are relinked into self and other becomes empty
+        key = key or (lambda x: x)
+        self.head, _ = self._merge_runs(self.head, other.head, key)
+        other.head = None
+        self._fix_prev()
+
+    def dedupe_sorted(self, key=None):
+        key = key or (lambda x: x)
+        cur = self.head
+        while cur and cur.next:
+            if key(cur.next.data) == key(cur.data):
+                cur.next = cur.next.next
+                if cur.next:
+                    cur.next.prev = cur
+            else:
+                cur = cur.next
+
     def println(self):
         itr = ''
         cur = self.head
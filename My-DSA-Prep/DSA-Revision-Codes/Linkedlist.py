@@ -160,6 +160,94 @@ class Linkedlist:
 
         self.head = prev # at the end we put the last prev as head
 
+    # sorting: bottom-up natural merge sort, only relinks the existing nodes
+    # O(n log n) time, O(1) extra space, stable (equal keys keep their order)
+    # key is not cached per node (that would need O(n) space): it runs about 2n times
+    # per pass, ~2 n log(runs) calls in total, where list.sort(key=...) calls it n times.
+    # with an expensive key, sorting (key, node) pairs in a python list is faster.
+
+    def _run_end(self, cur, key):
+        # walk while the values keep going up (or stay equal), that is one sorted run
+        # the key of the current node is kept, so key() runs once per node here
+        k = key(cur.data)
+        while cur.next:
+            nk = key(cur.next.data)
+            if nk < k:
+                break
+            cur = cur.next
+            k = nk
+        return cur
+
+    def _merge_runs(self, a, b, key):
+        # merge two sorted chains, returns (head, tail) of the merged chain
+        dummy = tail = Node(None)
+        # keys of the two front nodes are kept and only recomputed when that side moves
+        ka = key(a.data) if a else None
+        kb = key(b.data) if b else None
+        while a and b:
+            if kb < ka: # only take from b when strictly smaller -> stable
+                tail.next = b
+                b = b.next
+                if b:
+                    kb = key(b.data)
+            else:
+                tail.next = a
+                a = a.next
+                if a:
+                    ka = key(a.data)
+            tail = tail.next
+        tail.next = a if a else b
+        while tail.next:
+            tail = tail.next
+        return dummy.next, tail
+
+    def sort(self, key=None):
+        key = key or (lambda x: x)
+        while self.head:
+            runs = 0
+            new_head = tail = None
+            cur = self.head
+            while cur:
+                # cut two neighbouring runs out of the list and merge them
+                a = cur
+                a_end = self._run_end(a, key)
+                b = a_end.next
+                a_end.next = None
+                if b:
+                    b_end = self._run_end(b, key)
+                    cur = b_end.next
+                    b_end.next = None
+                    first, last = self._merge_runs(a, b, key)
+                else:
+                    cur = None
+                    first, last = a, a_end
+
+                if tail is None:
+                    new_head = first
+                else:
+                    tail.next = first
+                tail = last
+                runs += 1
+            self.head = new_head
+            if runs == 1: # everything is one sorted run now
+                break
+
+    def merge(self, other, key=None):
+        # both lists already sorted; the nodes of other get linked into self, other ends up empty
+        key = key or (lambda x: x)
+        self.head, _ = self._merge_runs(self.head, other.head, key)
+        other.head = None
+
+    def dedupe_sorted(self, key=None):
+        # list already sorted, so duplicates sit next to each other
+        key = key or (lambda x: x)
+        cur = self.head
+        while cur and cur.next:
+            if key(cur.next.data) == key(cur.data):
+                cur.next = cur.next.next
+            else:
+                cur = cur.next
+
     def println(self):
         cur = self.head
         itr = ''
@@ -0,0 +1,493 @@
+'''
+Balanced BST (treap) with order statistics, stored in parallel arrays
+(binary tree / BST flashcards: 7_binary_tree.png, 8_bst.png)
+
+A normal BST allocates one Node object per key (data, left, right, ...),
+that is ~100+ bytes per node in python. Here node i lives at index i of a few
+typed arrays instead, ~32 bytes per node:
+
+    index :   0    1    2    3
+    key   : [ -,  50,  20,  80 ]        (50)
+    left  : [ 0,   2,   0,   0 ]       /    \\
+    right : [ 0,   3,   0,   0 ]    (20)    (80)
+    size  : [ 0,   3,   1,   1 ]
+    prio  : [ 0, 900, 310, 420 ]
+
+- index 0 is the empty node (None), its size is 0
+- treap: BST order on key, max-heap order on a random prio -> expected height O(log n)
+- size[i] = number of nodes in the subtree of i -> rank / select in O(log n)
+- deleted slots go on a free-list (chained through left[]) and get reused
+- every operation is a loop, no recursion
+
+    insert / delete / get / floor / ceiling / rank / select -> O(log n) expected
+    items(lo, hi) -> in-order range iteration
+    build(sorted pairs) -> O(n)
+'''
+import random
+from array import array
+
+NIL = 0
+
+
+class ArrayTreap:
+    def __init__(self, key_type="q", value_type=None):
+        # key_type / value_type are array typecodes ('q' int64, 'd' float64 ...),
+        # value_type None keeps the values in a plain python list (any object)
+        self.keys = array(key_type, [0])
+        self.vals = array(value_type, [0]) if value_type else [None]
+        self.left = array("i", [NIL])
+        self.right = array("i", [NIL])
+        self.size = array("i", [0])
+        self.prio = array("I", [0])
+        self.root = NIL
+        self.free = NIL  # head of the free-list
+        self._rand = random.Random()
+
+    def __len__(self):
+        return self.size[self.root]
+
+    # ---------------- node storage ----------------
+
+    def _alloc(self, key, value):
+        prio = self._rand.getrandbits(32)
+        x = self.free
+        if x != NIL:
+            self.free = self.left[x]
+            self.keys[x] = key
+            self.vals[x] = value
+            self.left[x] = self.right[x] = NIL
+            self.size[x] = 1
+            self.prio[x] = prio
+            return x
+        self.keys.append(key)
+        self.vals.append(value)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.size.append(1)
+        self.prio.append(prio)
+        return len(self.keys) - 1
+
+    def _release(self, x):
+        self.left[x] = self.free
+        self.right[x] = NIL
+        self.size[x] = 0
+        if not isinstance(self.vals, array):
+            self.vals[x] = None  # let the object go
+        self.free = x
+
+    def _find(self, key):
+        keys, left, right = self.keys, self.left, self.right
+        cur = self.root
+        while cur != NIL:
+            k = keys[cur]
+            if key < k:
+                cur = left[cur]
+            elif k < key:
+                cur = right[cur]
+            else:
+                return cur
+        return NIL
+
+    def _set_child(self, parent, went_left, child):
+        if parent == NIL:
+            self.root = child
+        elif went_left:
+            self.left[parent] = child
+        else:
+            self.right[parent] = child
+
+    # ---------------- split / merge (iterative) ----------------
+
+    def _split(self, t, key):
+        # keys < key go to the left tree, keys > key to the right tree (key itself is not in t)
+        keys, left, right, size = self.keys, self.left, self.right, self.size
+        l_root = r_root = NIL
+        l_last = r_last = NIL  # node whose right (left tree) / left (right tree) is still open
+        touched = []
+        while t != NIL:
+            touched.append(t)
+            if keys[t] < key:
+                if l_last == NIL:
+                    l_root = t
+                else:
+                    right[l_last] = t
+                l_last = t
+                t = right[t]
+            else:
+                if r_last == NIL:
+                    r_root = t
+                else:
+                    left[r_last] = t
+                r_last = t
+                t = left[t]
+        if l_last != NIL:
+            right[l_last] = NIL
+        if r_last != NIL:
+            left[r_last] = NIL
+        # deeper nodes were touched later, fix sizes bottom-up
+        for x in reversed(touched):
+            size[x] = 1 + size[left[x]] + size[right[x]]
+        return l_root, r_root
+
+    def _merge(self, a, b):
+        # every key in a is smaller than every key in b
+        left, right, size, prio = self.left, self.right, self.size, self.prio
+        root = parent = NIL
+        went_left = False
+        while a != NIL and b != NIL:
+            if prio[a] > prio[b]:
+                # a stays on top, its right subtree becomes merge(right[a], b)
+                size[a] += size[b]
+                x, nxt_left = a, False
+                a = right[a]
+            else:
+                size[b] += size[a]
+                x, nxt_left = b, True
+                b = left[b]
+            if parent == NIL:
+                root = x
+            elif went_left:
+                left[parent] = x
+            else:
+                right[parent] = x
+            parent, went_left = x, nxt_left
+        rest = a if a != NIL else b
+        if parent == NIL:
+            return rest
+        if went_left:
+            left[parent] = rest
+        else:
+            right[parent] = rest
+        return root
+
+    # ---------------- map operations ----------------
+
+    def __contains__(self, key):
+        return self._find(key) != NIL
+
+    def get(self, key, default=None):
+        x = self._find(key)
+        return self.vals[x] if x != NIL else default
+
+    def __getitem__(self, key):
+        x = self._find(key)
+        if x == NIL:
+            raise KeyError(key)
+        return self.vals[x]
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def insert(self, key, value=0):
+        x = self._find(key)
+        if x != NIL:  # existing key, just update the value
+            self.vals[x] = value
+            return
+        new = self._alloc(key, value)
+        keys, left, right, size, prio = self.keys, self.left, self.right, self.size, self.prio
+        # go down while the nodes have higher priority, every one of them gains a node
+        parent = NIL
+        went_left = False
+        cur = self.root
+        p = prio[new]
+        while cur != NIL and prio[cur] > p:
+            size[cur] += 1
+            parent = cur
+            went_left = key < keys[cur]
+            cur = left[cur] if went_left else right[cur]
+        # the new node takes cur's place, cur's subtree is split below it
+        left[new], right[new] = self._split(cur, key)
+        size[new] = 1 + size[left[new]] + size[right[new]]
+        self._set_child(parent, went_left, new)
+
+    def delete(self, key):
+        keys, left, right, size = self.keys, self.left, self.right, self.size
+        path = []
+        parent = NIL
+        went_left = False
+        cur = self.root
+        while cur != NIL and keys[cur] != key:
+            path.append(cur)
+            parent = cur
+            went_left = key < keys[cur]
+            cur = left[cur] if went_left else right[cur]
+        if cur == NIL:
+            raise KeyError(key)
+        for x in path:
+            size[x] -= 1
+        # the node is replaced by its two subtrees merged together
+        self._set_child(parent, went_left, self._merge(left[cur], right[cur]))
+        self._release(cur)
+
+    def pop(self, key, *default):
+        x = self._find(key)
+        if x == NIL:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self.vals[x]
+        self.delete(key)
+        return value
+
+    # ---------------- ordered queries ----------------
+
+    def floor(self, key):
+        # largest key <= key, None if there is none
+        keys, left, right = self.keys, self.left, self.right
+        best = None
+        cur = self.root
+        while cur != NIL:
+            k = keys[cur]
+            if k == key:
+                return k
+            if k < key:
+                best = k
+                cur = right[cur]
+            else:
+                cur = left[cur]
+        return best
+
+    def ceiling(self, key):
+        # smallest key >= key, None if there is none
+        keys, left, right = self.keys, self.left, self.right
+        best = None
+        cur = self.root
+        while cur != NIL:
+            k = keys[cur]
+            if k == key:
+                return k
+            if k > key:
+                best = k
+                cur = left[cur]
+            else:
+                cur = right[cur]
+        return best
+
+    def rank(self, key):
+        # how many keys are < key
+        keys, left, right, size = self.keys, self.left, self.right, self.size
+        r = 0
+        cur = self.root
+        while cur != NIL:
+            if key <= keys[cur]:
+                cur = left[cur]
+            else:
+                r += size[left[cur]] + 1
+                cur = right[cur]
+        return r
+
+    def select(self, i):
+        # i-th smallest key (0 based), negative i counts from the end like a list
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("select index out of range")
+        left, right, size = self.left, self.right, self.size
+        cur = self.root
+        while True:
+            left_size = size[left[cur]]
+            if i < left_size:
+                cur = left[cur]
+            elif i == left_size:
+                return self.keys[cur]
+            else:
+                i -= left_size + 1
+                cur = right[cur]
+
+    def min(self):
+        return self.select(0)
+
+    def max(self):
+        return self.select(-1)
+
+    def items(self, lo=None, hi=None):
+        # (key, value) in order for lo <= key < hi, inorder walk with a stack
+        keys, vals, left, right = self.keys, self.vals, self.left, self.right
+        stack = []
+        cur = self.root
+        # only the path towards lo goes on the stack, smaller subtrees are skipped
+        while cur != NIL:
+            if lo is None or keys[cur] >= lo:
+                stack.append(cur)
+                cur = left[cur]
+            else:
+                cur = right[cur]
+        while stack:
+            cur = stack.pop()
+            k = keys[cur]
+            if hi is not None and k >= hi:
+                return
+            yield k, vals[cur]
+            cur = right[cur]
+            while cur != NIL:
+                stack.append(cur)
+                cur = left[cur]
+
+    def keys_between(self, lo=None, hi=None):
+        for k, _ in self.items(lo, hi):
+            yield k
+
+    def __iter__(self):
+        return self.keys_between()
+
+    # ---------------- bulk build ----------------
+
+    @classmethod
+    def build(cls, pairs, key_type="q", value_type=None):
+        '''
+        O(n) build from (key, value) pairs with strictly increasing keys.
+        random priorities + a stack (cartesian tree) -> same shape as inserting one by one.
+        '''
+        tree = cls(key_type, value_type)
+        keys, vals, left, right, size, prio = tree.keys, tree.vals, tree.left, tree.right, tree.size, tree.prio
+        getrandbits = tree._rand.getrandbits
+        stack = []
+        prev = None
+        for key, value in pairs:
+            if prev is not None and not prev < key:
+                raise ValueError("build() needs strictly increasing keys")
+            prev = key
+            x = len(keys)
+            p = getrandbits(32)
+            keys.append(key)
+            vals.append(value)
+            right.append(NIL)
+            size.append(1)
+            prio.append(p)
+            # nodes with lower priority on the right spine become the left subtree of x
+            last = NIL
+            while stack and prio[stack[-1]] < p:
+                last = stack.pop()
+                size[last] = 1 + size[left[last]] + size[right[last]]
+            left.append(last)
+            if stack:
+                right[stack[-1]] = x
+            stack.append(x)
+        last = NIL
+        while stack:
+            last = stack.pop()
+            size[last] = 1 + size[left[last]] + size[right[last]]
+        tree.root = last
+        return tree
+
+    def memory_bytes(self):
+        total = sum(a.buffer_info()[1] * a.itemsize for a in (self.keys, self.left, self.right, self.size, self.prio))
+        if isinstance(self.vals, array):
+            total += self.vals.buffer_info()[1] * self.vals.itemsize
+        return total
+
+
+def benchmark(n=10**6, ops=200_000):
+    import bisect
+    import time
+    import tracemalloc
+
+    rng = random.Random(0)
+    sample = rng.sample(range(n * 10), n + ops)
+    keys, extra = sample[:n], sample[n:]  # extra: new keys spread over the whole key range
+    queries = [rng.randrange(n * 10) for _ in range(ops)]
+
+    def rate(fn, count):
+        start = time.perf_counter()
+        fn()
+        return count / (time.perf_counter() - start)
+
+    print(f"n={n}, ops={ops}")
+
+    # memory: treap arrays vs a dict of the same int keys / values
+    tracemalloc.start()
+    tree = ArrayTreap.build(((k, k) for k in sorted(keys)), value_type="q")
+    tree_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    d = {k: k for k in keys}
+    dict_mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del d
+    print(f"memory  ArrayTreap: {tree_mem / n:6.1f} B/key   dict (unordered): {dict_mem / n:6.1f} B/key")
+
+    start = time.perf_counter()
+    ArrayTreap.build(((k, k) for k in sorted(keys)), value_type="q")
+    print(f"build (sorted)       {time.perf_counter() - start:8.2f} s")
+
+    print(f"{'operation':<20} {'ArrayTreap ops/s':>17} {'sorted list ops/s':>18}")
+    sorted_keys = sorted(keys)
+
+    def treap_floor():
+        for q in queries:
+            tree.floor(q)
+
+    def list_floor():
+        for q in queries:
+            i = bisect.bisect_right(sorted_keys, q)
+            sorted_keys[i - 1] if i else None
+
+    def treap_rank():
+        for q in queries:
+            tree.rank(q)
+
+    def list_rank():
+        for q in queries:
+            bisect.bisect_left(sorted_keys, q)
+
+    def treap_select():
+        for q in queries:
+            tree.select(q % n)
+
+    def list_select():
+        for q in queries:
+            sorted_keys[q % n]
+
+    def treap_insert():
+        for k in extra:
+            tree.insert(k, k)
+
+    def list_insert():
+        for k in extra:
+            bisect.insort(sorted_keys, k)
+
+    def treap_delete():
+        for k in extra:
+            tree.delete(k)
+
+    def list_delete():
+        for k in extra:
+            del sorted_keys[bisect.bisect_left(sorted_keys, k)]
+
+    def treap_range():
+        for _ in tree.items(keys[0], keys[0] + n):
+            pass
+
+    def list_range():
+        lo = bisect.bisect_left(sorted_keys, keys[0])
+        hi = bisect.bisect_left(sorted_keys, keys[0] + n)
+        for _ in sorted_keys[lo:hi]:
+            pass
+
+    # the sorted list is the speed reference for lookups; its inserts are O(n) memmoves
+    in_range = tree.rank(keys[0] + n) - tree.rank(keys[0])
+    for name, a, b, count in (
+        ("insert", treap_insert, list_insert, ops),
+        ("floor", treap_floor, list_floor, ops),
+        ("rank", treap_rank, list_rank, ops),
+        ("select", treap_select, list_select, ops),
+        ("delete", treap_delete, list_delete, ops),
+        ("range scan (keys)", treap_range, list_range, max(in_range, 1)),
+    ):
+        print(f"{name:<20} {rate(a, count):>17,.0f} {rate(b, count):>18,.0f}")
+
+
+if __name__ == "__main__":
+    t = ArrayTreap()
+    for k in [50, 20, 80, 10, 30, 70, 90]:
+        t.insert(k, str(k))
+    print(list(t))                 # [10, 20, 30, 50, 70, 80, 90]
+    print(t.floor(55), t.ceiling(55), t.rank(55), t.select(3))   # 50 70 4 50
+    t.delete(50)
+    print(list(t.items(20, 80)))   # [(20, '20'), (30, '30'), (70, '70')]
+
+    benchmark()
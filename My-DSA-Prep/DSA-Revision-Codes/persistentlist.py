@@ -0,0 +1,315 @@
+'''
+Persistent (immutable) list for Undo / Redo snapshots
+
+Undo / Redo and browser history are linkedlist applications (see Linkedlist.py),
+but snapshotting a Linkedlist or doub means copying every node.
+
+Here nodes are never changed after they are created. Every update copies only
+the nodes on the path it touches and shares everything else with the old
+version, so:
+
+- a snapshot is just keeping a reference to the current version -> O(1)
+- get / set / insert / delete / append -> O(log n) expected, O(log n) new nodes
+- old versions stay valid forever (until nobody holds them)
+
+Internally the list is a treap with implicit keys (position = size of the
+left subtree), rebuilt functionally with split / merge.
+
+      v1 ->  (B)                 v2 = v1.set(2, 'x')  ->  (B')
+            /   \                                        /    \
+          (A)   (C)        only B and C are copied     (A)   (C')
+                                A is shared by both versions
+
+History keeps the versions for undo / redo with a bounded number of undo steps.
+'''
+import random
+from collections import deque
+
+
+class PNode:
+    __slots__ = ("value", "prio", "size", "left", "right")
+
+    def __init__(self, value, prio, left=None, right=None):
+        self.value = value
+        self.prio = prio
+        self.left = left
+        self.right = right
+        self.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _split(node, k):
+    # first k elements go left, rest go right; copies only the nodes on the path
+    if node is None:
+        return None, None
+    left_size = _size(node.left)
+    if k <= left_size:
+        l, r = _split(node.left, k)
+        return l, PNode(node.value, node.prio, r, node.right)
+    l, r = _split(node.right, k - left_size - 1)
+    return PNode(node.value, node.prio, node.left, l), r
+
+
+def _merge(a, b):
+    # every element of a comes before every element of b
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        return PNode(a.value, a.prio, a.left, _merge(a.right, b))
+    return PNode(b.value, b.prio, _merge(a, b.left), b.right)
+
+
+def _build(items, lo, hi, depth, height):
+    # balanced tree from items[lo:hi]; priorities drop with depth so the heap order holds
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    prio = 1.0 - (depth + random.random()) / (height + 1)
+    return PNode(items[mid], prio,
+                 _build(items, lo, mid, depth + 1, height),
+                 _build(items, mid + 1, hi, depth + 1, height))
+
+
+class PersistentList:
+    __slots__ = ("root",)
+
+    def __init__(self, items=None):
+        self.root = None
+        if items:
+            items = list(items)
+            self.root = _build(items, 0, len(items), 0, len(items).bit_length())
+
+    @classmethod
+    def _from_root(cls, root):
+        new = cls()
+        new.root = root
+        return new
+
+    def __len__(self):
+        return _size(self.root)
+
+    def _index(self, i):
+        n = _size(self.root)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("list index out of range")
+        return i
+
+    def __getitem__(self, i):
+        i = self._index(i)
+        cur = self.root
+        while True:
+            left_size = _size(cur.left)
+            if i < left_size:
+                cur = cur.left
+            elif i == left_size:
+                return cur.value
+            else:
+                i -= left_size + 1
+                cur = cur.right
+
+    def __iter__(self):
+        # inorder traversal with a stack, no recursion
+        stack = []
+        cur = self.root
+        while stack or cur:
+            while cur:
+                stack.append(cur)
+                cur = cur.left
+            cur = stack.pop()
+            yield cur.value
+            cur = cur.right
+
+    def __eq__(self, other):
+        if not isinstance(other, PersistentList):
+            return NotImplemented
+        return self.root is other.root or (len(self) == len(other) and list(self) == list(other))
+
+    # every update below returns a new version, self is never touched
+
+    def set(self, i, value):
+        i = self._index(i)
+        path = []
+        cur = self.root
+        while True:
+            left_size = _size(cur.left)
+            if i < left_size:
+                path.append((cur, True))
+                cur = cur.left
+            elif i == left_size:
+                break
+            else:
+                path.append((cur, False))
+                i -= left_size + 1
+                cur = cur.right
+        # copy the found node and then every parent on the way back up
+        new = PNode(value, cur.prio, cur.left, cur.right)
+        while path:
+            parent, went_left = path.pop()
+            if went_left:
+                new = PNode(parent.value, parent.prio, new, parent.right)
+            else:
+                new = PNode(parent.value, parent.prio, parent.left, new)
+        return PersistentList._from_root(new)
+
+    def insert(self, i, value):
+        n = _size(self.root)
+        if i < 0:
+            i = max(0, i + n)
+        i = min(i, n)
+        l, r = _split(self.root, i)
+        return PersistentList._from_root(_merge(_merge(l, PNode(value, random.random())), r))
+
+    def append(self, value):
+        return self.insert(len(self), value)
+
+    def delete(self, i):
+        i = self._index(i)
+        l, r = _split(self.root, i)
+        _, r = _split(r, 1)
+        return PersistentList._from_root(_merge(l, r))
+
+    def println(self):
+        itr = ''
+        for value in self:
+            itr += str(value) + "->"
+        return itr + "None"
+
+
+class History:
+    '''
+    undo / redo over PersistentList versions.
+    limit bounds how many undo steps are kept; the oldest ones are dropped
+    so their nodes can be garbage collected (None keeps everything).
+    '''
+    def __init__(self, initial=None, limit=100):
+        self.current = initial if initial is not None else PersistentList()
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+
+    def commit(self, version):
+        # new edit: remember where we were, and the redo branch is gone
+        self.undo_stack.append(self.current)
+        self.redo_stack.clear()
+        self.current = version
+        return version
+
+    def can_undo(self):
+        return len(self.undo_stack) > 0
+
+    def can_redo(self):
+        return len(self.redo_stack) > 0
+
+    def undo(self):
+        if not self.undo_stack:
+            print("Nothing to undo")
+            return self.current
+        self.redo_stack.append(self.current)
+        self.current = self.undo_stack.pop()
+        return self.current
+
+    def redo(self):
+        if not self.redo_stack:
+            print("Nothing to redo")
+            return self.current
+        self.undo_stack.append(self.current)
+        self.current = self.redo_stack.pop()
+        return self.current
+
+
+def benchmark(size=200, edits=100_000, copy_edits=300, limit=1_000, checkpoints=10):
+    '''
+    snapshot after every edit, memory in use printed at checkpoints along the way:
+    - PersistentList: keep the new version in History (structural sharing), all edits
+    - Linkedlist / doub: edit one node, then copy.deepcopy the whole list.
+      only copy_edits of them (a few ms each), and size stays small because deepcopy
+      recurses node by node and hits the recursion limit on long lists.
+    '''
+    import contextlib
+    import copy
+    import io
+    import time
+    import tracemalloc
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the modules print their demos on import
+        from Linkedlist import Linkedlist
+        from Doublylinkedlist import doub
+
+    rng = random.Random(0)
+    ops = []
+    for _ in range(edits):
+        kind = rng.randrange(3)
+        ops.append((kind, rng.random(), rng.randrange(1000)))
+
+    def run(name, count, edit, snapshot):
+        every = max(1, count // checkpoints)
+        tracemalloc.start()
+        start = time.perf_counter()
+        for i in range(count):
+            snapshot(edit(i))
+            if (i + 1) % every == 0:
+                used = tracemalloc.get_traced_memory()[0]
+                per_edit = (time.perf_counter() - start) / (i + 1)
+                print(f"{name:<28} {i + 1:>8} {per_edit * 1e6:>12.1f} {used / 2**20:>9.1f}")
+        tracemalloc.stop()
+
+    def persistent(retain):
+        history = History(PersistentList(range(size)), limit=retain)
+
+        def edit(i):
+            kind, where, value = ops[i]
+            cur = history.current
+            n = len(cur)
+            if kind == 0 or n == 0:
+                return cur.insert(int(where * (n + 1)), value)
+            if kind == 1:
+                return cur.set(int(where * n), value)
+            return cur.delete(int(where * n))
+
+        return edit, history.commit
+
+    def deep(lst, retain):
+        snapshots = deque(maxlen=retain)
+
+        def edit(i):
+            # same size list every time: overwrite one node's data
+            _, where, value = ops[i]
+            cur = lst.head
+            for _ in range(int(where * size)):
+                cur = cur.next
+            cur.data = value
+            return lst
+
+        return edit, lambda version: snapshots.append(copy.deepcopy(version))
+
+    ll = Linkedlist()
+    dl = doub()
+    for i in range(size):
+        ll.insert(i)
+        dl.insert(i)
+
+    print(f"list size={size}, undo limit={limit}")
+    print(f"{'structure':<28} {'edits':>8} {'us/edit':>12} {'MB in use':>9}")
+    run("PersistentList (bounded)", edits, *persistent(limit))
+    run("PersistentList (keep all)", edits, *persistent(None))
+    run("Linkedlist deepcopy", copy_edits, *deep(ll, limit))
+    run("doub deepcopy", copy_edits, *deep(dl, limit))
+
+
+if __name__ == "__main__":
+    h = History(PersistentList([10, 20, 30]), limit=10)
+    h.commit(h.current.append(40))
+    h.commit(h.current.set(0, 5))
+    h.commit(h.current.delete(1))
+    print(h.current.println())   # 5->30->40->None
+    print(h.undo().println())    # 5->20->30->40->None
+    print(h.undo().println())    # 10->20->30->40->None
+    print(h.redo().println())    # 5->20->30->40->None
+
+    benchmark()
@@ -0,0 +1,390 @@
+'''
+Polynomial representation using linkedlist
+Each node stores coefficient and power (see Linkedlist.py applications).
+
+- terms are kept sorted by power, highest power first
+- zero coefficients are never stored, so the list stays sparse
+- addition is a merge of two sorted lists -> O(n + m)
+- multiplication:
+    sparse -> heap based k-way merge of the partial products -> O(n*m log(min(n, m)))
+    dense  -> numpy convolution (FFT for big inputs) -> O(d log d), d = degree
+- evaluation at many points at once (vectorised with numpy when available)
+
+      -------------------------      -------------------------
+head->| coef | power | next.addr | --> | coef | power | next.addr | --> None
+      -------------------------      -------------------------
+
+    3x^5 + 2x^2 - 7   ->   (3,5) -> (2,2) -> (-7,0) -> None
+'''
+import heapq
+import random
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the sparse paths work without it
+    np = None
+
+
+# a term counts as "dense" when at least this fraction of the powers between
+# the lowest and highest power are present
+DENSE_RATIO = 0.1
+# below this size np.convolve (direct) is faster than going through the FFT
+FFT_CUTOFF = 1 << 12
+# the FFT round-off error grows like eps * |a| * |b| * log2(size) (|.| = 2-norm), and
+# rint() only gives the exact integer while that error stays well below 0.5;
+# eps = 2^-53, so 2^44 leaves a safety factor of ~2^8 for the constant in front
+FFT_EXACT_LIMIT = 1 << 44
+# int64 arrays only hold coefficients below 2^63
+INT64_LIMIT = 1 << 63
+
+
+class Term:
+    __slots__ = ("coef", "power", "next")  # 10^6 terms -> no per node __dict__
+
+    def __init__(self, coef, power):
+        self.coef = coef
+        self.power = power
+        self.next = None
+
+
+class Polynomial:
+    def __init__(self, terms=None):
+        self.head = None
+        self.size = 0
+        if terms:
+            # combine equal powers first, then link highest power first
+            merged = {}
+            for coef, power in terms:
+                if power < 0:
+                    raise ValueError("power must be >= 0")
+                merged[power] = merged.get(power, 0) + coef
+            self._link((merged[p], p) for p in sorted(merged, reverse=True))
+
+    @classmethod
+    def from_sorted(cls, pairs):
+        # pairs already ordered by decreasing power and without duplicates
+        poly = cls()
+        poly._link(pairs)
+        return poly
+
+    def _link(self, pairs):
+        tail = None
+        for coef, power in pairs:
+            if coef == 0:
+                continue
+            new = Term(coef, power)
+            if tail is None:
+                self.head = new
+            else:
+                tail.next = new
+            tail = new
+            self.size += 1
+
+    def insert(self, coef, power):
+        # walk to the right place, O(n) like Linkedlist.insert_pos
+        if coef == 0:
+            return
+        prev = None
+        cur = self.head
+        while cur and cur.power > power:
+            prev = cur
+            cur = cur.next
+
+        if cur and cur.power == power:
+            cur.coef += coef
+            if cur.coef == 0:  # terms cancelled, unlink the node
+                if prev is None:
+                    self.head = cur.next
+                else:
+                    prev.next = cur.next
+                self.size -= 1
+            return
+
+        new = Term(coef, power)
+        new.next = cur
+        if prev is None:
+            self.head = new
+        else:
+            prev.next = new
+        self.size += 1
+
+    def __iter__(self):
+        cur = self.head
+        while cur:
+            yield cur.coef, cur.power
+            cur = cur.next
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if not isinstance(other, Polynomial):
+            return NotImplemented
+        return self.size == other.size and list(self) == list(other)
+
+    def degree(self):
+        return self.head.power if self.head else -1
+
+    def _low_power(self):
+        cur = self.head
+        if cur is None:
+            return 0
+        while cur.next:
+            cur = cur.next
+        return cur.power
+
+    def is_dense(self):
+        if self.head is None:
+            return False
+        span = self.degree() - self._low_power() + 1
+        return self.size / span >= DENSE_RATIO
+
+    # ---------------- addition ----------------
+
+    def add(self, other):
+        # plain merge of two sorted lists, equal powers get combined
+        result = Polynomial()
+        tail = None
+        a = self.head
+        b = other.head
+        while a or b:
+            if b is None or (a and a.power > b.power):
+                coef, power = a.coef, a.power
+                a = a.next
+            elif a is None or b.power > a.power:
+                coef, power = b.coef, b.power
+                b = b.next
+            else:
+                coef, power = a.coef + b.coef, a.power
+                a = a.next
+                b = b.next
+            if coef == 0:
+                continue
+            new = Term(coef, power)
+            if tail is None:
+                result.head = new
+            else:
+                tail.next = new
+            tail = new
+            result.size += 1
+        return result
+
+    def __add__(self, other):
+        return self.add(other)
+
+    def __neg__(self):
+        return Polynomial.from_sorted((-c, p) for c, p in self)
+
+    def __sub__(self, other):
+        return self.add(-other)
+
+    # ---------------- multiplication ----------------
+
+    def multiply(self, other):
+        if self.head is None or other.head is None:
+            return Polynomial()
+        if np is not None and self.is_dense() and other.is_dense():
+            result = self._mul_dense(other)
+            if result is not None:
+                return result
+        return self._mul_heap(other)
+
+    def __mul__(self, other):
+        return self.multiply(other)
+
+    def _mul_heap(self, other):
+        '''
+        every term a of the shorter list gives a sorted stream a*b for b in the other list.
+        the heap holds the current head of each stream, so popping gives the products
+        in decreasing power and equal powers come out next to each other.
+        '''
+        small, big = (self, other) if self.size <= other.size else (other, self)
+        heap = []
+        i = 0
+        a = small.head
+        while a:
+            # (negated power so the min-heap pops the highest power, tie breaker, term a, term b)
+            heap.append((-(a.power + big.head.power), i, a, big.head))
+            a = a.next
+            i += 1
+        heapq.heapify(heap)
+
+        result = Polynomial()
+        tail = None
+        acc = 0
+        acc_power = None
+        while heap:
+            key, i, a, b = heap[0]
+            power = -key
+            if power != acc_power:
+                if acc:
+                    new = Term(acc, acc_power)
+                    if tail is None:
+                        result.head = new
+                    else:
+                        tail.next = new
+                    tail = new
+                    result.size += 1
+                acc = 0
+                acc_power = power
+            acc += a.coef * b.coef
+            b = b.next
+            if b:
+                heapq.heapreplace(heap, (-(a.power + b.power), i, a, b))
+            else:
+                heapq.heappop(heap)
+
+        if acc:
+            new = Term(acc, acc_power)
+            if tail is None:
+                result.head = new
+            else:
+                tail.next = new
+            result.size += 1
+        return result
+
+    def _to_array(self, low, integral):
+        # coefficients indexed by power - low (lowest power first, like numpy expects)
+        arr = np.zeros(self.degree() - low + 1, dtype=np.int64 if integral else np.float64)
+        cur = self.head
+        while cur:
+            arr[cur.power - low] = cur.coef
+            cur = cur.next
+        return arr
+
+    def _mul_dense(self, other):
+        # returns None when numpy cannot give an exact answer, the caller then uses the heap
+        types = {type(c) for c, _ in self} | {type(c) for c, _ in other}
+        if not types <= {int, float}:
+            # Fraction / Decimal / complex / bool ... would be turned into float64 (or fail), keep them exact
+            return None
+        integral = types == {int}
+        if integral:
+            # check in python ints first, big coefficients would overflow the int64 arrays
+            max_a = max(abs(c) for c, _ in self)
+            max_b = max(abs(c) for c, _ in other)
+            if max_a >= INT64_LIMIT or max_b >= INT64_LIMIT:
+                return None
+        low_a = self._low_power()
+        low_b = other._low_power()
+        a = self._to_array(low_a, integral)
+        b = other._to_array(low_b, integral)
+
+        if len(a) + len(b) <= FFT_CUTOFF:
+            if integral and max_a * max_b * min(len(a), len(b)) >= INT64_LIMIT // 2:  # int64 sum would overflow
+                return None
+            prod = np.convolve(a, b)
+        else:
+            n = len(a) + len(b) - 1
+            size = 1 << (n - 1).bit_length()
+            if integral:
+                norm_a = float(np.linalg.norm(a.astype(np.float64)))
+                norm_b = float(np.linalg.norm(b.astype(np.float64)))
+                if norm_a * norm_b * size.bit_length() >= FFT_EXACT_LIMIT:
+                    return None
+            prod = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:n]
+            if integral:
+                rounded = np.rint(prod)
+                # every value must sit close to an integer, otherwise the rounding is a guess
+                if np.abs(prod - rounded).max() >= 0.25:
+                    return None
+                prod = rounded.astype(np.int64)
+            else:
+                # round-off leaves tiny values where the true coefficient is 0, drop them
+                noise = 1e-12 * np.abs(a).sum() * np.abs(b).max()
+                prod[np.abs(prod) <= noise] = 0
+
+        low = low_a + low_b
+        nz = np.flatnonzero(prod)[::-1]  # highest power first
+        cast = int if integral else float
+        return Polynomial.from_sorted((cast(prod[k]), int(k) + low) for k in nz)
+
+    # ---------------- evaluation ----------------
+
+    def evaluate(self, x):
+        # Horner over the sparse terms: jump the gap between powers with x**gap
+        result = 0
+        cur = self.head
+        if cur is None:
+            return result
+        power = cur.power
+        while cur:
+            result = result * x ** (power - cur.power) + cur.coef
+            power = cur.power
+            cur = cur.next
+        return result * x ** power
+
+    def evaluate_many(self, xs):
+        # same Horner loop but over a whole vector of points, one pass over the terms
+        if np is None:
+            return [self.evaluate(x) for x in xs]
+        # float points before any power is taken, int64 xs ** gap would wrap around
+        xs = np.asarray(xs)
+        xs = xs.astype(np.result_type(xs, np.float64), copy=False)
+        result = np.zeros(xs.shape, dtype=xs.dtype)
+        cur = self.head
+        if cur is None:
+            return result
+        power = cur.power
+        while cur:
+            gap = power - cur.power
+            if gap == 1:
+                result *= xs
+            elif gap:
+                result *= xs ** gap
+            result += cur.coef
+            power = cur.power
+            cur = cur.next
+        if power:
+            result *= xs ** power
+        return result
+
+    def println(self):
+        cur = self.head
+        itr = ''
+        while cur:
+            itr += f"({cur.coef}x^{cur.power})" + "->"
+            cur = cur.next
+        return itr + "None"
+
+
+def random_poly(n, density, seed=0):
+    # n terms spread over roughly n / density powers
+    rng = random.Random(seed)
+    span = max(n, int(n / density))
+    powers = rng.sample(range(span), n)
+    return Polynomial((rng.randint(-9, 9) or 1, p) for p in powers)
+
+
+def benchmark(n=1000, densities=(1.0, 0.5, 0.1, 0.01, 0.001)):
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    print(f"terms={n}  numpy={'yes' if np is not None else 'no'}")
+    print(f"{'density':>8} {'add':>9} {'mul heap':>10} {'mul auto':>10} {'eval 10^4 pts':>14}")
+    points = [i / 10000 for i in range(10000)]
+    for density in densities:
+        p = random_poly(n, density, seed=1)
+        q = random_poly(n, density, seed=2)
+        _, t_add = timed(lambda: p + q)
+        heap_res, t_heap = timed(lambda: p._mul_heap(q))
+        auto_res, t_auto = timed(lambda: p * q)
+        assert heap_res == auto_res
+        _, t_eval = timed(lambda: p.evaluate_many(points))
+        print(f"{density:>8} {t_add:>8.4f}s {t_heap:>9.4f}s {t_auto:>9.4f}s {t_eval:>13.4f}s")
+
+
+if __name__ == "__main__":
+    p1 = Polynomial([(3, 5), (2, 2), (-7, 0)])
+    p2 = Polynomial([(1, 2), (4, 1)])
+    print(p1.println())
+    print(p2.println())
+    print((p1 + p2).println())
+    print((p1 * p2).println())
+    print(p1.evaluate(2))  # 3*32 + 2*4 - 7 = 97
+    print(p1.evaluate_many([0, 1, 2]))
+
+    benchmark()
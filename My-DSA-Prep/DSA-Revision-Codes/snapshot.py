@@ -0,0 +1,301 @@
+'''
+Binary snapshot / restore for Linkedlist, doub, Array_stack and Array_queue
+
+pickle walks a Linkedlist node by node (Node -> next -> Node -> ...), which is
+slow and blows the recursion limit on long lists. Here the values are written
+flat instead:
+
+    header : magic | version | kind | class name | meta (top, cap, front, ...)
+    chunks : typecode | count | nbytes | payload      (repeated)
+    end    : a chunk with count 0
+
+- 'q' chunk -> int64 values, 'd' chunk -> float64 values, copied straight from an array
+  (little-endian like the header, swapped on big-endian machines)
+- 'p' chunk -> anything else, pickled as one flat python list (no recursion)
+- save / load stream CHUNK values at a time, so a list is never held twice in memory
+- restore builds the nodes in one loop, no recursion
+
+After register(...) plain pickle uses the same chunks, and with protocol 5 the
+typed payloads go out-of-band:
+
+    register(Linkedlist, doub)
+    buffers = []
+    data = pickle.dumps(lst, protocol=5, buffer_callback=buffers.append)
+    lst2 = pickle.loads(data, buffers=buffers)
+'''
+import io
+import pickle
+import struct
+import sys
+from array import array
+
+MAGIC = b"DSNP"
+VERSION = 2
+CHUNK = 1 << 16
+
+LINKED, STACK, QUEUE = 1, 2, 3
+META_FIELDS = {
+    LINKED: (),
+    STACK: ("top", "cap"),
+    QUEUE: ("front", "rear", "cur", "cap"),
+}
+
+_HEADER = struct.Struct("<4sBBB")
+_CHUNK = struct.Struct("<cIQ")
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _kind(obj):
+    # duck typing, so this file does not need to import the demo scripts
+    if hasattr(obj, "head"):
+        return LINKED
+    if hasattr(obj, "arr") and hasattr(obj, "top"):
+        return STACK
+    if hasattr(obj, "queue") and hasattr(obj, "front"):
+        return QUEUE
+    raise TypeError(f"cannot snapshot {type(obj).__name__}")
+
+
+def _values(obj, kind):
+    if kind == LINKED:
+        cur = obj.head
+        while cur:
+            yield cur.data
+            cur = cur.next
+    elif kind == STACK:
+        yield from obj.arr
+    else:
+        yield from obj.queue
+
+
+def _batches(values):
+    batch = []
+    for v in values:
+        batch.append(v)
+        if len(batch) == CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _little_endian(arr):
+    # payloads are little-endian like the header, so a snapshot loads on any machine
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def _encode(batch):
+    # typed array when every value fits, otherwise one flat pickle
+    if all(type(v) is int and _INT64_MIN <= v <= _INT64_MAX for v in batch):
+        return b"q", _little_endian(array("q", batch))
+    if all(type(v) is float for v in batch):
+        return b"d", _little_endian(array("d", batch))
+    return b"p", pickle.dumps(batch, protocol=5)
+
+
+def _decode(typecode, payload):
+    if typecode == b"p":
+        return pickle.loads(payload)
+    arr = array(typecode.decode())
+    arr.frombytes(memoryview(payload).cast("B"))
+    return _little_endian(arr)
+
+
+def _header(obj, kind):
+    meta = [getattr(obj, name) for name in META_FIELDS[kind]]
+    name = type(obj).__name__.encode()
+    return (_HEADER.pack(MAGIC, VERSION, kind, len(name)) + name +
+            struct.pack("<B", len(meta)) + struct.pack(f"<{len(meta)}q", *meta))
+
+
+def _read_header(f, cls):
+    magic, version, kind, name_len = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a snapshot file")
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    name = f.read(name_len).decode()
+    # a stack snapshot loaded as a Linkedlist would give an object with no head
+    if name != cls.__name__:
+        raise TypeError(f"snapshot holds a {name}, cannot load it as {cls.__name__}")
+    (n_meta,) = struct.unpack("<B", f.read(1))
+    meta = struct.unpack(f"<{n_meta}q", f.read(8 * n_meta))
+    return kind, dict(zip(META_FIELDS[kind], meta))
+
+
+class _Builder:
+    # collects values chunk by chunk and links nodes as they come in
+    def __init__(self, cls, kind, meta):
+        self.kind = kind
+        self.obj = cls.__new__(cls)
+        for name, value in meta.items():
+            setattr(self.obj, name, value)
+        if kind == LINKED:
+            self.node = sys.modules[cls.__module__].Node
+            self.obj.head = None
+            self.tail = None
+            self.doubly = None
+        else:
+            self.items = []
+
+    def extend(self, values):
+        if self.kind != LINKED:
+            self.items.extend(values)
+            return
+        Node = self.node
+        tail = self.tail
+        for v in values:
+            new = Node(v)
+            if tail is None:
+                self.obj.head = new
+                self.doubly = hasattr(new, "prev")
+            else:
+                tail.next = new
+                if self.doubly:
+                    new.prev = tail
+            tail = new
+        self.tail = tail
+
+    def finish(self):
+        if self.kind == STACK:
+            self.obj.arr = self.items
+        elif self.kind == QUEUE:
+            self.obj.queue = self.items
+        return self.obj
+
+
+def save(obj, f):
+    '''write obj to a binary file object (or a path)'''
+    if isinstance(f, (str, bytes)) or hasattr(f, "__fspath__"):
+        with open(f, "wb") as fh:
+            return save(obj, fh)
+    kind = _kind(obj)
+    f.write(_header(obj, kind))
+    for batch in _batches(_values(obj, kind)):
+        typecode, payload = _encode(batch)
+        payload = memoryview(payload).cast("B")
+        f.write(_CHUNK.pack(typecode, len(batch), payload.nbytes))
+        f.write(payload)
+    f.write(_CHUNK.pack(b"p", 0, 0))
+
+
+def load(f, cls):
+    '''read a snapshot written by save() back into a new cls object'''
+    if isinstance(f, (str, bytes)) or hasattr(f, "__fspath__"):
+        with open(f, "rb") as fh:
+            return load(fh, cls)
+    kind, meta = _read_header(f, cls)
+    builder = _Builder(cls, kind, meta)
+    while True:
+        typecode, count, nbytes = _CHUNK.unpack(f.read(_CHUNK.size))
+        if count == 0:
+            break
+        builder.extend(_decode(typecode, f.read(nbytes)))
+    return builder.finish()
+
+
+def dumps(obj):
+    buf = io.BytesIO()
+    save(obj, buf)
+    return buf.getvalue()
+
+
+def loads(data, cls):
+    return load(io.BytesIO(data), cls)
+
+
+# ---------------- pickle integration ----------------
+
+def _rebuild(cls, header, chunks):
+    kind, meta = _read_header(io.BytesIO(header), cls)
+    builder = _Builder(cls, kind, meta)
+    for typecode, payload in chunks:
+        builder.extend(_decode(typecode, payload))
+    return builder.finish()
+
+
+def _reduce_ex(obj, protocol):
+    kind = _kind(obj)
+    chunks = []
+    for batch in _batches(_values(obj, kind)):
+        typecode, payload = _encode(batch)
+        if typecode != b"p":
+            # protocol 5 can hand the array memory out-of-band, older ones need bytes
+            payload = pickle.PickleBuffer(payload) if protocol >= 5 else payload.tobytes()
+        chunks.append((typecode, payload))
+    return _rebuild, (type(obj), _header(obj, kind), chunks)
+
+
+def register(*classes):
+    '''make pickle use the flat chunk format for these classes'''
+    for cls in classes:
+        cls.__reduce_ex__ = _reduce_ex
+
+
+def unregister(*classes):
+    for cls in classes:
+        if cls.__dict__.get("__reduce_ex__") is _reduce_ex:
+            del cls.__reduce_ex__
+
+
+def benchmark(n=10**6):
+    import contextlib
+    import os
+    import tempfile
+    import time
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the modules print their demos on import
+        import Linkedlist as sll
+        import Doublylinkedlist as dll
+
+    def build(module, cls):
+        lst = cls()
+        tail = None
+        for v in range(n):
+            new = module.Node(v)
+            if tail is None:
+                lst.head = new
+            else:
+                tail.next = new
+                if hasattr(new, "prev"):
+                    new.prev = tail
+            tail = new
+        return lst
+
+    def timed(fn):
+        start = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - start
+
+    print(f"n={n}")
+    print(f"{'structure':<12} {'method':<22} {'dump s':>8} {'load s':>8} {'MB':>7}")
+    path = os.path.join(tempfile.mkdtemp(), "snap.bin")
+    for module, cls in ((sll, sll.Linkedlist), (dll, dll.doub)):
+        lst = build(module, cls)
+
+        _, t_dump = timed(lambda: save(lst, path))
+        _, t_load = timed(lambda: load(path, cls))
+        print(f"{cls.__name__:<12} {'save/load file':<22} {t_dump:>8.2f} {t_load:>8.2f} "
+              f"{os.path.getsize(path) / 2**20:>7.1f}")
+
+        register(cls)
+        buffers = []
+        data, t_dump = timed(lambda: pickle.dumps(lst, protocol=5, buffer_callback=buffers.append))
+        _, t_load = timed(lambda: pickle.loads(data, buffers=buffers))
+        size = len(data) + sum(memoryview(b).nbytes for b in buffers)
+        print(f"{cls.__name__:<12} {'pickle5 out-of-band':<22} {t_dump:>8.2f} {t_load:>8.2f} {size / 2**20:>7.1f}")
+        unregister(cls)
+
+        try:
+            data, t_dump = timed(lambda: pickle.dumps(lst, protocol=5))
+            _, t_load = timed(lambda: pickle.loads(data))
+            print(f"{cls.__name__:<12} {'plain pickle':<22} {t_dump:>8.2f} {t_load:>8.2f} {len(data) / 2**20:>7.1f}")
+        except RecursionError:
+            print(f"{cls.__name__:<12} {'plain pickle':<22} {'RecursionError':>17}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
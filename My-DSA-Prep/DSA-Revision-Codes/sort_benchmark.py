@@ -0,0 +1,79 @@
+'''
+Benchmark: in-place merge sort of Linkedlist / doub vs the old way
+(copy the data into a python list, list.sort(), build brand new nodes).
+
+usage: python sort_benchmark.py [n]      default n = 10^6
+'''
+import contextlib
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+with contextlib.redirect_stdout(io.StringIO()):  # the modules print their demos on import
+    import Linkedlist as sll
+    import Doublylinkedlist as dll
+
+
+def build(module, cls, values):
+    # link the nodes directly, insert() walks the whole list every time
+    lst = cls()
+    tail = None
+    for v in values:
+        new = module.Node(v)
+        if tail is None:
+            lst.head = new
+        else:
+            tail.next = new
+            if hasattr(new, "prev"):
+                new.prev = tail
+        tail = new
+    return lst
+
+
+def copy_sort_rebuild(module, lst):
+    data = []
+    cur = lst.head
+    while cur:
+        data.append(cur.data)
+        cur = cur.next
+    data.sort()
+    lst.head = None
+    rebuilt = build(module, type(lst), data)
+    lst.head = rebuilt.head
+
+
+def measure(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return elapsed
+
+
+def measure_peak(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark(n=10**6):
+    rng = random.Random(0)
+    values = [rng.randrange(n) for _ in range(n)]
+    print(f"n={n}")
+    print(f"{'structure':<12} {'method':<20} {'time s':>8} {'peak MB':>9}")
+    for module, cls in ((sll, sll.Linkedlist), (dll, dll.doub)):
+        for name, sorter in (("in-place sort", lambda l: l.sort()),
+                             ("copy-sort-rebuild", lambda l: copy_sort_rebuild(module, l))):
+            lst = build(module, cls, values)
+            elapsed = measure(lambda: sorter(lst))
+            # separate run for memory, tracemalloc slows everything down
+            lst = build(module, cls, values)
+            peak = measure_peak(lambda: sorter(lst))
+            print(f"{cls.__name__:<12} {name:<20} {elapsed:>8.2f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
@@ -0,0 +1,408 @@
+'''
+Unrolled doubly linked deque
+
+doub (Doublylinkedlist.py) has one node per element:
+
+    | prev.address | data | next.address |
+
+for a small int the two pointers (and the node object) are much bigger than the
+data, and every step to the next element is a new object somewhere else in memory.
+
+Here every node holds a block of up to BLOCK elements:
+
+    None <- | prev | [10, 20, 30, 40] | next | <-> | prev | [50, 60] | next | -> None
+
+- append / appendleft / pop / popleft -> O(1) (only touch the first / last block)
+- insert(pos, x) / delete(pos) -> walk block by block, O(n / BLOCK), then
+  a full block is split in two halves, and a block that drops under half full
+  is merged with a neighbour or borrows from it, so blocks stay about half full
+- blocks() gives whole blocks, so a scan is one python list per BLOCK elements
+'''
+import random
+import time
+
+BLOCK = 64
+
+
+class Block:
+    __slots__ = ("data", "prev", "next")
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else []
+        self.prev = None
+        self.next = None
+
+
+class UnrolledDeque:
+    def __init__(self, items=None, block=BLOCK):
+        if block < 4:
+            # smaller blocks have no room between "under half full" and "empty"
+            raise ValueError("block size must be at least 4")
+        self.block = block
+        self.head = None
+        self.tail = None
+        self.size = 0
+        if items:
+            for x in items:
+                self.append(x)
+
+    def __len__(self):
+        return self.size
+
+    # ---------------- linking blocks ----------------
+
+    def _link_after(self, blk, new):
+        # blk None -> new becomes the head
+        if blk is None:
+            new.next = self.head
+            if self.head:
+                self.head.prev = new
+            self.head = new
+        else:
+            new.prev = blk
+            new.next = blk.next
+            if blk.next:
+                blk.next.prev = new
+            blk.next = new
+        if new.next is None:
+            self.tail = new
+
+    def _unlink(self, blk):
+        if blk.prev:
+            blk.prev.next = blk.next
+        else:
+            self.head = blk.next
+        if blk.next:
+            blk.next.prev = blk.prev
+        else:
+            self.tail = blk.prev
+        blk.prev = blk.next = None
+
+    # ---------------- ends ----------------
+
+    def append(self, x):
+        tail = self.tail
+        if tail is None or len(tail.data) == self.block:
+            tail = Block()
+            self._link_after(self.tail, tail)
+        tail.data.append(x)
+        self.size += 1
+
+    def appendleft(self, x):
+        head = self.head
+        if head is None or len(head.data) == self.block:
+            head = Block()
+            self._link_after(None, head)
+        head.data.insert(0, x)  # at most BLOCK items move
+        self.size += 1
+
+    def pop(self):
+        if self.tail is None:
+            raise IndexError("pop from an empty deque")
+        tail = self.tail
+        x = tail.data.pop()
+        if not tail.data:
+            self._unlink(tail)
+        self.size -= 1
+        return x
+
+    def popleft(self):
+        if self.head is None:
+            raise IndexError("pop from an empty deque")
+        head = self.head
+        x = head.data.pop(0)
+        if not head.data:
+            self._unlink(head)
+        self.size -= 1
+        return x
+
+    def peek(self):
+        if self.tail is None:
+            raise IndexError("peek at an empty deque")
+        return self.tail.data[-1]
+
+    def peekleft(self):
+        if self.head is None:
+            raise IndexError("peek at an empty deque")
+        return self.head.data[0]
+
+    # ---------------- positions ----------------
+
+    def _locate(self, pos):
+        # (block, offset inside block); walk from whichever end is closer
+        if pos < self.size // 2:
+            blk = self.head
+            while pos >= len(blk.data):
+                pos -= len(blk.data)
+                blk = blk.next
+            return blk, pos
+        pos = self.size - pos  # counted from the back now, >= 1
+        blk = self.tail
+        while pos > len(blk.data):
+            pos -= len(blk.data)
+            blk = blk.prev
+        return blk, len(blk.data) - pos
+
+    def _index(self, pos):
+        if pos < 0:
+            pos += self.size
+        if not 0 <= pos < self.size:
+            raise IndexError("deque index out of range")
+        return pos
+
+    def __getitem__(self, pos):
+        blk, off = self._locate(self._index(pos))
+        return blk.data[off]
+
+    def __setitem__(self, pos, x):
+        blk, off = self._locate(self._index(pos))
+        blk.data[off] = x
+
+    def insert(self, pos, x):
+        # like list.insert: pos is clamped to [0, len]
+        if pos < 0:
+            pos = max(0, pos + self.size)
+        if pos >= self.size:
+            self.append(x)
+            return
+        if pos == 0:
+            self.appendleft(x)
+            return
+        blk, off = self._locate(pos)
+        if len(blk.data) == self.block:
+            # full: move the second half into a new block after this one
+            half = self.block // 2
+            new = Block(blk.data[half:])
+            del blk.data[half:]
+            self._link_after(blk, new)
+            if off > half:
+                blk, off = new, off - half
+        blk.data.insert(off, x)
+        self.size += 1
+
+    def delete(self, pos):
+        blk, off = self._locate(self._index(pos))
+        x = blk.data.pop(off)
+        self.size -= 1
+        if not blk.data:
+            self._unlink(blk)
+        else:
+            self._rebalance(blk)
+        return x
+
+    def _rebalance(self, blk):
+        # a block under half full merges with a neighbour when both fit in one block,
+        # otherwise it borrows from the neighbour until both are at least half full
+        if len(blk.data) >= self.block // 2:
+            return
+        if blk.next:
+            left, right = blk, blk.next
+        elif blk.prev:
+            left, right = blk.prev, blk
+        else:
+            return
+        if len(left.data) + len(right.data) <= self.block:
+            left.data.extend(right.data)
+            self._unlink(right)
+        elif left is blk:
+            move = (len(right.data) - len(blk.data)) // 2
+            blk.data.extend(right.data[:move])
+            del right.data[:move]
+        else:
+            move = (len(left.data) - len(blk.data)) // 2
+            blk.data[:0] = left.data[-move:]
+            del left.data[-move:]
+
+    # ---------------- iteration ----------------
+
+    def blocks(self):
+        # each block's list as it is stored, do not resize them while iterating
+        blk = self.head
+        while blk:
+            yield blk.data
+            blk = blk.next
+
+    def __iter__(self):
+        for data in self.blocks():
+            yield from data
+
+    def __reversed__(self):
+        blk = self.tail
+        while blk:
+            yield from reversed(blk.data)
+            blk = blk.prev
+
+    def println(self):
+        itr = ''
+        blk = self.head
+        while blk:
+            itr += str(blk.data) + '<->'
+            blk = blk.next
+        return itr + "None"
+
+
+def benchmark(n=100_000, middle_ops=2_000, scans=10):
+    import contextlib
+    import io
+    from collections import deque
+
+    with contextlib.redirect_stdout(io.StringIO()):  # Doublylinkedlist.py prints its demo on import
+        import Doublylinkedlist as dll
+
+    # doub only has insert() (walks to the end) and front_delete(); keep a tail here and
+    # link the Node objects the same way, so doub gets O(1) ends like the others
+    class DoubEnds:
+        def __init__(self):
+            self.lst = dll.doub()
+            self.tail = None
+            self.size = 0
+
+        def append(self, x):
+            new = dll.Node(x)
+            if self.tail is None:
+                self.lst.head = new
+            else:
+                self.tail.next = new
+                new.prev = self.tail
+            self.tail = new
+            self.size += 1
+
+        def appendleft(self, x):
+            new = dll.Node(x)
+            new.next = self.lst.head
+            if self.lst.head:
+                self.lst.head.prev = new
+            else:
+                self.tail = new
+            self.lst.head = new
+            self.size += 1
+
+        def pop(self):
+            node = self.tail
+            self.tail = node.prev
+            if self.tail:
+                self.tail.next = None
+            else:
+                self.lst.head = None
+            self.size -= 1
+            return node.data
+
+        def popleft(self):
+            node = self.lst.head
+            self.lst.head = node.next
+            if node.next:
+                node.next.prev = None
+            else:
+                self.tail = None
+            self.size -= 1
+            return node.data
+
+        def insert(self, pos, x):
+            cur = self.lst.head
+            for _ in range(pos - 1):
+                cur = cur.next
+            new = dll.Node(x)
+            new.prev = cur
+            new.next = cur.next
+            cur.next.prev = new
+            cur.next = new
+            self.size += 1
+
+        def delete(self, pos):
+            cur = self.lst.head
+            for _ in range(pos):
+                cur = cur.next
+            cur.prev.next = cur.next
+            cur.next.prev = cur.prev
+            self.size -= 1
+
+        def __iter__(self):
+            cur = self.lst.head
+            while cur:
+                yield cur.data
+                cur = cur.next
+
+    class ListEnds(list):
+        def appendleft(self, x):
+            self.insert(0, x)
+
+        def popleft(self):
+            return self.pop(0)
+
+        def delete(self, pos):
+            del self[pos]
+
+    class DequeEdits(deque):
+        def delete(self, pos):
+            del self[pos]
+
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    def scan_blocks(d):
+        total = 0
+        for data in d.blocks():
+            total += sum(data)
+        return total
+
+    rng = random.Random(0)
+    positions = [rng.randrange(1, n - 1) for _ in range(middle_ops)]
+    makers = (
+        ("UnrolledDeque", UnrolledDeque),
+        ("doub", DoubEnds),
+        ("collections.deque", DequeEdits),
+        ("list", ListEnds),
+    )
+    print(f"n={n}, middle edits={middle_ops}, scans={scans}")
+    print(f"{'structure':<18} {'append+pop':>11} {'appendleft+popleft':>19} {'middle edits':>13} {'scan':>8}")
+    for name, make in makers:
+        d = make()
+
+        def ends_right():
+            for i in range(n):
+                d.append(i)
+            for _ in range(n):
+                d.pop()
+
+        def ends_left():
+            for i in range(n):
+                d.appendleft(i)
+            for _ in range(n):
+                d.popleft()
+
+        t_right = timed(ends_right)
+        t_left = timed(ends_left)  # list.insert(0) is O(n) here, expect it to be slow
+
+        for i in range(n):
+            d.append(i)
+
+        def middle():
+            for p in positions:
+                d.insert(p, p)
+                d.delete(p)
+
+        t_middle = timed(middle)
+
+        def scan():
+            for _ in range(scans):
+                if isinstance(d, UnrolledDeque):
+                    scan_blocks(d)
+                else:
+                    sum(d)
+
+        t_scan = timed(scan)
+        print(f"{name:<18} {t_right:>10.3f}s {t_left:>18.3f}s {t_middle:>12.3f}s {t_scan:>7.3f}s")
+
+
+if __name__ == "__main__":
+    d = UnrolledDeque(range(10), block=4)
+    d.appendleft(-1)
+    d.insert(5, 99)
+    print(d.println())
+    d.delete(5)
+    print(d.pop(), d.popleft())
+    print(list(d))
+
+    benchmark()
@@ -0,0 +1,326 @@
+'''
+Out-of-core chunked arrays for the Numpycode.ipynb patterns
+
+Numpycode.ipynb builds arrays in memory with np.zeros / np.ones / np.full (order='C' or 'F'),
+np.arange / np.linspace and slices them. When the array is bigger than RAM the same
+things can be done on a .npy file opened with np.memmap, one chunk at a time.
+
+- zeros / ones / full / arange / linspace write a .npy file chunk by chunk
+- ChunkedArray walks the file in the order it is stored:
+    order='C' (row-major)    -> chunks are blocks of rows     arr[i:j, ...]
+    order='F' (column-major) -> chunks are blocks of columns  arr[..., i:j]
+  so every chunk is one contiguous piece of the file -> sequential I/O
+- elementwise ops and whole-array reductions go over the flat storage-order view
+  instead, so even one huge row (C) / column (F) is cut into chunk_bytes pieces
+- elementwise ops (map, +, -, *, /) write into a new .npy, chunk by chunk
+- sum / min / max / mean with axis=None or any axis
+- workers=N runs the chunks in a thread pool (numpy releases the GIL while it works)
+
+    a = zeros("a.npy", (50_000, 20_000), order="F")
+    b = (a + 1).map(np.sqrt, out="b.npy")
+    b.mean(axis=0)
+'''
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CHUNK_BYTES = 64 * 2**20  # ~64 MB of data per chunk
+
+
+class ChunkedArray:
+    def __init__(self, path, mode="r+", chunk_bytes=CHUNK_BYTES, workers=None):
+        self.path = path
+        self.data = np.lib.format.open_memmap(path, mode=mode)
+        self.chunk_bytes = chunk_bytes
+        self.workers = workers
+
+    @classmethod
+    def create(cls, path, shape, dtype=float, order="C", **kwargs):
+        if order not in ("C", "F"):
+            raise ValueError("order must be 'C' or 'F'")
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape,
+                                  fortran_order=(order == "F")).flush()
+        return cls(path, **kwargs)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def ndim(self):
+        return self.data.ndim
+
+    @property
+    def order(self):
+        # c_contiguous first: 1-D and shapes like (N, 1) are both, and those are stored as C
+        return "C" if self.data.flags.c_contiguous else "F"
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def flush(self):
+        self.data.flush()
+
+    # ---------------- chunking ----------------
+
+    def chunk_axis(self):
+        # the outermost axis in memory: rows for C, columns (last axis) for F
+        return self.ndim - 1 if self.order == "F" else 0
+
+    def chunks(self, axis=None):
+        '''
+        tuples of slices, each one a block along axis (default: chunk_axis(), the sequential one).
+        any other axis works too, but then every chunk is strided over the whole file.
+        '''
+        if self.ndim == 0:
+            yield ()
+            return
+        axis = self.chunk_axis() if axis is None else axis % self.ndim
+        n = self.shape[axis]
+        per_step = self.dtype.itemsize * max(1, self.data.size // max(n, 1))
+        step = max(1, self.chunk_bytes // per_step)
+        for start in range(0, n, step):
+            index = [slice(None)] * self.ndim
+            index[axis] = slice(start, min(start + step, n))
+            yield tuple(index)
+
+    def flat(self):
+        # 1-D view in storage order, no copy since the file is contiguous in that order
+        return self.data.reshape(-1, order=self.order)
+
+    def flat_chunks(self):
+        # slices of flat(), chunk_bytes each, not tied to rows / columns at all
+        n = self.data.size
+        step = max(1, self.chunk_bytes // self.dtype.itemsize)
+        for start in range(0, n, step):
+            yield slice(start, min(start + step, n))
+
+    def iter_chunks(self, axis=None):
+        for index in self.chunks(axis):
+            yield index, self.data[index]
+
+    def _run(self, fn, indexes):
+        # fn(index) for every chunk, in order; threads when workers is set
+        if self.workers and self.workers > 1:
+            with ThreadPoolExecutor(self.workers) as pool:
+                return list(pool.map(fn, indexes))
+        return [fn(index) for index in indexes]
+
+    # ---------------- elementwise ----------------
+
+    def map(self, func, *others, out=None, dtype=None):
+        '''out[chunk] = func(self[chunk], *(o[chunk] for o in others)); out is a path or ChunkedArray'''
+        for other in others:
+            if isinstance(other, ChunkedArray) and other.shape != self.shape:
+                raise ValueError(f"shape mismatch {self.shape} vs {other.shape}")
+        if out is None:
+            fd, out = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(os.path.abspath(self.path)))
+            os.close(fd)
+        if not isinstance(out, ChunkedArray):
+            if dtype is None:
+                # probe func on one element for the output dtype, without warnings like 0 / 0
+                sample = [np.ones(1, self.dtype)] + [np.ones(1, o.dtype) if isinstance(o, ChunkedArray) else o
+                                                     for o in others]
+                with np.errstate(all="ignore"):
+                    dtype = np.asarray(func(*sample)).dtype
+            out = ChunkedArray.create(out, self.shape, dtype, self.order,
+                                      chunk_bytes=self.chunk_bytes, workers=self.workers)
+
+        arrays = [out, self] + [o for o in others if isinstance(o, ChunkedArray)]
+        if all(a.order == self.order for a in arrays):
+            # same layout everywhere: walk the flat views in chunk_bytes pieces
+            views = {id(a): a.flat() for a in arrays}
+            indexes = list(self.flat_chunks())
+        else:
+            # mixed C / F inputs: blocks along the chunk axis of self
+            views = {id(a): a.data for a in arrays}
+            indexes = list(self.chunks())
+        src = views[id(self)]
+        dst = views[id(out)]
+
+        def work(index):
+            args = [views[id(o)][index] if isinstance(o, ChunkedArray) else o for o in others]
+            dst[index] = func(src[index], *args)
+
+        self._run(work, indexes)
+        out.flush()
+        return out
+
+    def _binary(self, other, ufunc):
+        return self.map(ufunc, other)
+
+    def __add__(self, other):
+        return self._binary(other, np.add)
+
+    def __sub__(self, other):
+        return self._binary(other, np.subtract)
+
+    def __mul__(self, other):
+        return self._binary(other, np.multiply)
+
+    def __truediv__(self, other):
+        return self._binary(other, np.true_divide)
+
+    def fill(self, value):
+        flat = self.flat()
+
+        def work(index):
+            flat[index] = value
+        self._run(work, list(self.flat_chunks()))
+        self.flush()
+
+    # ---------------- reductions ----------------
+
+    def _reduce(self, ufunc, axis=None, dtype=None):
+        if self.data.size == 0:
+            # nothing to read: numpy gives the identity (sum) or raises ValueError (min / max)
+            return ufunc.reduce(self.data, axis=axis, dtype=dtype)
+        if axis is None:
+            flat = self.flat()
+            partials = self._run(lambda index: ufunc.reduce(flat[index], dtype=dtype), list(self.flat_chunks()))
+            result = partials[0]
+            for part in partials[1:]:
+                result = ufunc(result, part)
+            return result
+
+        indexes = list(self.chunks())
+        k = self.chunk_axis()
+        axis %= self.ndim
+        partials = self._run(lambda index: ufunc.reduce(self.data[index], axis=axis, dtype=dtype), indexes)
+
+        if axis == k:
+            # every chunk gave a full sized partial result, fold them together
+            result = partials[0]
+            for part in partials[1:]:
+                result = ufunc(result, part)
+            return result
+
+        # axis != k: each chunk owns a slice of the result along the chunk axis
+        out_axis = k - 1 if axis < k else k
+        return np.concatenate(partials, axis=out_axis)
+
+    def sum(self, axis=None, dtype=None):
+        return self._reduce(np.add, axis, dtype)
+
+    def min(self, axis=None):
+        return self._reduce(np.minimum, axis)
+
+    def max(self, axis=None):
+        return self._reduce(np.maximum, axis)
+
+    def mean(self, axis=None):
+        # float64 accumulator, like np.mean for integer input
+        count = self.data.size if axis is None else self.shape[axis]
+        return self.sum(axis, dtype=np.float64) / count
+
+    def load(self):
+        # the naive way: everything into RAM
+        return np.array(self.data)
+
+
+# ---------------- constructors (like np.zeros / np.ones / np.full / np.arange / np.linspace) ----------------
+
+def open_array(path, mode="r+", **kwargs):
+    return ChunkedArray(path, mode, **kwargs)
+
+
+def full(path, shape, fill_value, dtype=None, order="C", **kwargs):
+    if dtype is None:
+        dtype = np.asarray(fill_value).dtype
+    arr = ChunkedArray.create(path, shape, dtype, order, **kwargs)
+    arr.fill(fill_value)
+    return arr
+
+
+def zeros(path, shape, dtype=float, order="C", **kwargs):
+    # a fresh memmap file is already all zero bytes, nothing to write
+    return ChunkedArray.create(path, shape, dtype, order, **kwargs)
+
+
+def ones(path, shape, dtype=float, order="C", **kwargs):
+    return full(path, shape, 1, dtype, order, **kwargs)
+
+
+def arange(path, start, stop=None, step=1, dtype=None, **kwargs):
+    if stop is None:
+        start, stop = 0, start
+    n = max(0, int(np.ceil((stop - start) / step)))
+    if dtype is None:
+        dtype = np.arange(start, start + step, step).dtype
+    arr = ChunkedArray.create(path, n, dtype, **kwargs)
+    for (index,) in arr.chunks():
+        arr.data[index] = start + np.arange(index.start, index.stop, dtype=np.float64 if
+                                            np.dtype(dtype).kind == "f" else np.int64) * step
+    arr.flush()
+    return arr
+
+
+def linspace(path, start, stop, num=50, endpoint=True, dtype=float, **kwargs):
+    arr = ChunkedArray.create(path, num, dtype, **kwargs)
+    div = (num - 1) if endpoint else num
+    step = (stop - start) / div if div > 0 else 0.0
+    for (index,) in arr.chunks():
+        arr.data[index] = start + np.arange(index.start, index.stop) * step
+    if endpoint and num > 1:
+        arr.data[-1] = stop
+    arr.flush()
+    return arr
+
+
+def benchmark(shape=(8192, 4096), chunk_bytes=16 * 2**20, workers=4):
+    import time
+    import tracemalloc
+
+    def measure(fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return out, elapsed, peak
+
+    workdir = tempfile.mkdtemp()
+    size_mb = np.prod(shape) * 8 / 2**20
+    print(f"shape={shape} float64 ({size_mb:.0f} MB), chunk={chunk_bytes // 2**20} MB")
+    print(f"{'order':<6} {'method':<34} {'time s':>8} {'peak MB':>9}")
+    for order in ("C", "F"):
+        path = os.path.join(workdir, f"{order}.npy")
+        arr = full(path, shape, 1.5, order=order, chunk_bytes=chunk_bytes)
+        wrong_axis = 0 if order == "F" else arr.ndim - 1
+        runs = [
+            ("naive: load everything, .sum()", lambda: arr.load().sum()),
+            ("chunked sum (memory order)", lambda: arr.sum()),
+            ("chunked sum (other axis)", lambda: sum(c.sum() for _, c in arr.iter_chunks(wrong_axis))),
+            (f"chunked sum, {workers} threads", lambda: ChunkedArray(path, chunk_bytes=chunk_bytes,
+                                                                     workers=workers).sum()),
+            ("chunked mean(axis=0)", lambda: arr.mean(axis=0)),
+            ("naive: load, a * 2 + 1", lambda: arr.load() * 2 + 1),
+            ("chunked map a * 2 + 1", lambda: arr.map(lambda x: x * 2 + 1)),
+        ]
+        for name, fn in runs:
+            out, elapsed, peak = measure(fn)
+            print(f"{order:<6} {name:<34} {elapsed:>8.2f} {peak / 2**20:>9.1f}")
+            if isinstance(out, ChunkedArray):
+                del out.data
+                os.remove(out.path)
+        del arr.data
+        os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    benchmark()
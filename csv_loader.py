@@ -0,0 +1,381 @@
+'''
+Chunked, cached CSV loading for the Pandascode.ipynb workflow
+
+Pandascode.ipynb does:
+    df = pd.read_csv("country_classification.csv")
+    df.head() / df.info() / df.describe()
+and every rerun parses the whole file again with inferred dtypes.
+
+Here:
+- the CSV is read in chunks (pd.read_csv(chunksize=...)) with usecols projection
+- dtypes get downcast: integer columns -> smallest int that fits,
+  string columns -> category codes (int) + a categories list, float64 -> float_dtype
+- describe()-style statistics are built chunk by chunk (count / mean / std / min / max
+  for numbers, count / unique / top / freq for strings), the full frame is never held
+- the result is cached next to the CSV as one .npy per column + manifest.json,
+  and later loads memory-map the .npy files instead of parsing the CSV again
+- the cache is thrown away when the CSV changes: mtime + size are checked first,
+  and when those differ the file hash decides (a touched but unchanged file keeps its cache)
+
+    df = load_csv("country_classification.csv")
+    print(describe_csv("country_classification.csv"))
+'''
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CHUNKSIZE = 100_000
+CACHE_DIR = ".csv_cache"
+CACHE_VERSION = 2
+# float64 holds every integer exactly up to 2^53, float columns with whole numbers only go to int inside that
+_EXACT_INT = 1 << 53
+_INT64_MAX = (1 << 63) - 1
+
+
+def file_hash(path, block=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+def cache_path(path, cache_dir=None):
+    path = os.path.abspath(path)
+    base = cache_dir or os.path.join(os.path.dirname(path), CACHE_DIR)
+    return os.path.join(base, os.path.basename(path))
+
+
+def clear_cache(path, cache_dir=None):
+    shutil.rmtree(cache_path(path, cache_dir), ignore_errors=True)
+
+
+def _smallest_int(lo, hi):
+    for dt in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dt)
+    return np.dtype(np.int64)
+
+
+class _NumericColumn:
+    '''running count / mean / M2 (Welford, merged per chunk) / min / max'''
+    kind = "numeric"
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw  # temp file with the values in row order, int64 until a float chunk shows up
+        self.raw_dtype = np.dtype(np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.integral = True
+        self.has_nan = False
+
+    def _to_float(self):
+        # floats or missing values showed up: the int64 values so far become float64,
+        # the same thing pd.read_csv does with the whole column
+        self.raw.close()
+        name = self.raw.name
+        with open(name, "rb") as src, open(name + ".f8", "wb") as dst:
+            while True:
+                block = np.fromfile(src, dtype=np.int64, count=CHUNKSIZE)
+                if not len(block):
+                    break
+                block.astype(np.float64).tofile(dst)
+        os.replace(name + ".f8", name)
+        self.raw = open(name, "ab")
+        self.raw_dtype = np.dtype(np.float64)
+
+    def update(self, series):
+        if self.raw_dtype.kind == "i" and (series.dtype.kind not in "biu" or series.isna().any()):
+            self._to_float()
+        if self.raw_dtype.kind == "i":
+            # integers stay int64 all the way, float64 would round anything above 2^53 (ids, ns timestamps)
+            if series.dtype.kind == "u" and len(series) and series.max() > _INT64_MAX:
+                raise ValueError(f"column {self.name!r} has integers above int64; pass dtype={{{self.name!r}: str}}")
+            values = series.to_numpy(dtype=np.int64)
+            values.tofile(self.raw)
+            valid = values
+        else:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            values.tofile(self.raw)
+            valid = values[~np.isnan(values)]
+            if len(valid) < len(values):
+                self.has_nan = True
+            if len(valid) and self.integral and not np.array_equal(valid, np.trunc(valid)):
+                self.integral = False
+        if not len(valid):
+            return
+        # merge this chunk's (count, mean, M2) into the running one
+        n = len(valid)
+        mean = valid.mean()
+        m2 = ((valid - mean) ** 2).sum()
+        delta = mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        # .item() -> python int / float, so int64 min / max stay exact
+        self.min = min(self.min, valid.min().item())
+        self.max = max(self.max, valid.max().item())
+
+    def dtype(self, float_dtype):
+        if not self.count:
+            return np.dtype(float_dtype)
+        if self.raw_dtype.kind == "i":
+            return _smallest_int(self.min, self.max)
+        if self.integral and not self.has_nan and -_EXACT_INT <= self.min and self.max <= _EXACT_INT:
+            return _smallest_int(int(self.min), int(self.max))
+        return np.dtype(float_dtype)
+
+    def stats(self):
+        std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float("nan")
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else float("nan"),
+            "std": std,
+            "min": self.min if self.count else float("nan"),
+            "max": self.max if self.count else float("nan"),
+        }
+
+
+class _CategoryColumn:
+    '''strings -> integer codes, categories collected across chunks, -1 for missing'''
+    kind = "category"
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+        self.raw_dtype = np.dtype(np.int64)
+        self.codes = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.count = 0
+
+    def update(self, series):
+        # factorize the chunk, then only its few distinct values go through the python dict
+        local, uniques = pd.factorize(series)
+        lookup = self.codes
+        mapping = np.array([lookup.setdefault(str(u), len(lookup)) for u in uniques] + [-1], dtype=np.int64)
+        codes = mapping[local]  # local == -1 (missing) picks the trailing -1
+        codes.tofile(self.raw)
+        present = codes[codes >= 0]
+        self.count += len(present)
+        if len(lookup) > len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(len(lookup) - len(self.counts), np.int64)])
+        self.counts += np.bincount(present, minlength=len(self.counts))
+
+    def dtype(self, float_dtype):
+        return _smallest_int(-1, max(len(self.codes) - 1, 0))
+
+    def categories(self):
+        return list(self.codes)
+
+    def stats(self):
+        if not self.count:
+            return {"count": 0, "unique": 0, "top": None, "freq": 0}
+        top = int(self.counts.argmax())
+        return {
+            "count": self.count,
+            "unique": len(self.codes),
+            "top": self.categories()[top],
+            "freq": int(self.counts[top]),
+        }
+
+
+def _new_column(name, series, raw):
+    if series.dtype.kind in "biuf":
+        return _NumericColumn(name, raw)
+    return _CategoryColumn(name, raw)
+
+
+def _scan(path, usecols, dtype, chunksize, workdir):
+    '''one pass over the CSV: stats + every column written raw (int64 / float64) to workdir'''
+    columns = {}
+    rows = 0
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        for name in chunk.columns:
+            series = chunk[name]
+            col = columns.get(name)
+            if col is None:
+                raw = open(os.path.join(workdir, f"{len(columns)}.raw"), "wb")
+                col = columns[name] = _new_column(name, series, raw)
+            elif col.kind == "numeric" and series.dtype.kind not in "biuf":
+                raise ValueError(f"column {name!r} changes from numbers to text after row {rows}; "
+                                 f"pass dtype={{{name!r}: str}}")
+            col.update(series)
+        rows += len(chunk)
+    for col in columns.values():
+        col.raw.close()
+    return columns, rows
+
+
+def _stats_frame(manifest):
+    numeric = {c["name"]: c["stats"] for c in manifest["columns"] if c["kind"] == "numeric"}
+    if numeric:
+        return pd.DataFrame(numeric).loc[["count", "mean", "std", "min", "max"]]
+    return pd.DataFrame({c["name"]: c["stats"] for c in manifest["columns"]})
+
+
+def _params(usecols, dtype, float_dtype):
+    if callable(usecols):
+        # a function cannot be compared with the one the cache was built with -> no reuse, always rebuild
+        return None
+    return {
+        "usecols": list(usecols) if usecols is not None else None,
+        "dtype": {k: str(v) for k, v in dtype.items()} if isinstance(dtype, dict) else str(dtype),
+        "float_dtype": np.dtype(float_dtype).name,
+    }
+
+
+def _valid_manifest(path, target, params):
+    try:
+        with open(os.path.join(target, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != CACHE_VERSION or manifest.get("params") != params:
+        return None
+    st = os.stat(path)
+    if manifest["size"] == st.st_size and manifest["mtime_ns"] == st.st_mtime_ns:
+        return manifest
+    # mtime moved (copied / touched): only rebuild when the content really changed
+    if manifest["size"] != st.st_size or manifest["hash"] != file_hash(path):
+        return None
+    manifest["mtime_ns"] = st.st_mtime_ns
+    with open(os.path.join(target, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def build_cache(path, usecols=None, dtype=None, chunksize=CHUNKSIZE, float_dtype=np.float64, cache_dir=None):
+    '''parse the CSV once in chunks and write the columnar cache, returns the manifest'''
+    target = cache_path(path, cache_dir)
+    params = _params(usecols, dtype, float_dtype)
+    st = os.stat(path)
+    digest = file_hash(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    workdir = tempfile.mkdtemp(dir=os.path.dirname(target))
+    try:
+        columns, rows = _scan(path, usecols, dtype, chunksize, workdir)
+        entries = []
+        for i, col in enumerate(columns.values()):
+            out_dtype = col.dtype(float_dtype)
+            raw = np.memmap(col.raw.name, dtype=col.raw_dtype, mode="r", shape=(rows,)) if rows else np.zeros(0)
+            out = np.lib.format.open_memmap(os.path.join(workdir, f"{i}.npy"), mode="w+",
+                                            dtype=out_dtype, shape=(rows,))
+            # downcast chunk by chunk so the raw column is never fully in memory
+            for start in range(0, rows, chunksize):
+                out[start:start + chunksize] = raw[start:start + chunksize].astype(out_dtype)
+            out.flush()
+            del out, raw
+            os.remove(col.raw.name)
+            entry = {"name": col.name, "file": f"{i}.npy", "kind": col.kind,
+                     "dtype": out_dtype.name, "stats": col.stats()}
+            if col.kind == "category":
+                entry["categories"] = col.categories()
+            entries.append(entry)
+
+        manifest = {"version": CACHE_VERSION, "source": os.path.abspath(path), "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns, "hash": digest, "params": params,
+                    "rows": rows, "columns": entries}
+        with open(os.path.join(workdir, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        # swap the finished directory in, a half written cache is never visible
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(workdir, target)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _manifest(path, usecols, dtype, chunksize, float_dtype, cache_dir):
+    target = cache_path(path, cache_dir)
+    params = _params(usecols, dtype, float_dtype)
+    manifest = _valid_manifest(path, target, params) if params is not None else None
+    if manifest is None:
+        manifest = build_cache(path, usecols, dtype, chunksize, float_dtype, cache_dir)
+    return manifest
+
+
+def load_columns(path, usecols=None, dtype=None, chunksize=CHUNKSIZE, float_dtype=np.float64, cache_dir=None):
+    '''dict of column name -> read-only memory-mapped array (category columns hold codes)'''
+    manifest = _manifest(path, usecols, dtype, chunksize, float_dtype, cache_dir)
+    target = cache_path(path, cache_dir)
+    return {c["name"]: np.load(os.path.join(target, c["file"]), mmap_mode="r") for c in manifest["columns"]}
+
+
+def load_csv(path, usecols=None, dtype=None, chunksize=CHUNKSIZE, float_dtype=np.float64, cache_dir=None):
+    '''like pd.read_csv(path, usecols=...) but downcast and served from the cache when possible'''
+    manifest = _manifest(path, usecols, dtype, chunksize, float_dtype, cache_dir)
+    target = cache_path(path, cache_dir)
+    data = {}
+    for c in manifest["columns"]:
+        values = np.load(os.path.join(target, c["file"]), mmap_mode="r")
+        if c["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=c["categories"])
+        data[c["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def describe_csv(path, usecols=None, dtype=None, chunksize=CHUNKSIZE, float_dtype=np.float64, cache_dir=None):
+    '''df.describe() numbers (no percentiles, they need every value) from the cache manifest'''
+    return _stats_frame(_manifest(path, usecols, dtype, chunksize, float_dtype, cache_dir))
+
+
+def benchmark(rows=10**6, path=None):
+    import time
+    import tracemalloc
+
+    def measure(fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return out, elapsed, peak
+
+    workdir = None
+    if path is None:
+        # synthetic file shaped like country_classification.csv (codes, labels, numbers)
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, "sample.csv")
+        rng = np.random.default_rng(0)
+        labels = np.array([f"Country {i}" for i in range(250)])
+        pd.DataFrame({
+            "code": rng.integers(0, 1000, rows),
+            "label": labels[rng.integers(0, 250, rows)],
+            "year": rng.integers(1990, 2026, rows),
+            "value": rng.normal(100, 15, rows),
+        }).to_csv(path, index=False)
+
+    clear_cache(path)
+    print(f"{'load':<22} {'time s':>8} {'peak MB':>9}")
+    for name, fn in (
+        ("pd.read_csv", lambda: pd.read_csv(path)),
+        ("load_csv (cold)", lambda: load_csv(path)),
+        ("load_csv (cached)", lambda: load_csv(path)),
+        ("describe_csv (cached)", lambda: describe_csv(path)),
+    ):
+        _, elapsed, peak = measure(fn)
+        print(f"{name:<22} {elapsed:>8.2f} {peak / 2**20:>9.1f}")
+
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(path=sys.argv[1] if len(sys.argv) > 1 else None)